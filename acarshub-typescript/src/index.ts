@@ -42,6 +42,7 @@ import {
   labels,
   system_status,
   html_msg,
+  html_msg_batch,
   terms,
   database_size,
   current_search,
@@ -230,12 +231,41 @@ $((): void => {
     }
   });
 
+  socket.on("acars_msg_batch", function (msg: html_msg_batch): void {
+    // Several messages sent over in one go. Either the recent messages we are sent
+    // when we connect (loading is set) or new messages that arrived together
+    if (typeof msg.loading == "undefined") {
+      msg.messages.forEach((message: acars_msg): void => {
+        const new_msg: html_msg = { msghtml: message };
+        live_messages_page.new_acars_message(new_msg); // send the message to live messages
+        alerts_page.alerts_acars_message(new_msg); // send the message to alerts for processing
+      });
+    } else if (connection_good) {
+      msg.messages.forEach((message: acars_msg, index: number): void => {
+        live_messages_page.new_acars_message({
+          msghtml: message,
+          loading: msg.loading,
+          done_loading:
+            msg.done_loading === true && index === msg.messages.length - 1,
+        });
+      });
+    }
+  });
+
   socket.on("terms", function (msg: terms): void {
     alerts_page.alerts_terms(msg); // send the terms over to the alert page
   });
 
-  socket.on("alert_matches", function (msg: html_msg): void {
-    alerts_page.alerts_acars_message(msg);
+  socket.on("alert_matches_batch", function (msg: html_msg_batch): void {
+    // saved alert matches, oldest first. The page is drawn after the last one
+    msg.messages.forEach((message: acars_msg, index: number): void => {
+      alerts_page.alerts_acars_message({
+        msghtml: message,
+        loading: msg.loading,
+        done_loading:
+          msg.done_loading === true && index === msg.messages.length - 1,
+      });
+    });
   });
 
   socket.on("database", function (msg: database_size): void {
@@ -335,6 +365,14 @@ $((): void => {
     stats_page.signal_count(msg);
   });
 
+  // everything sent on connect arrives in one event, keyed by the event each part
+  // would have been sent as. Hand the parts to those handlers in the order sent
+  socket.on("connect_bundle", function (bundle: { [event: string]: any }): void {
+    for (const [event, msg] of Object.entries(bundle)) {
+      socket.listeners(event).forEach((handler) => handler(msg));
+    }
+  });
+
   // socket errors
 
   socket.on("disconnect", function (): void {
@@ -155,6 +155,12 @@ export interface html_msg {
   done_loading?: boolean;
 }
 
+export interface html_msg_batch {
+  messages: acars_msg[];
+  loading?: boolean;
+  done_loading?: boolean;
+}
+
 export interface search_html_msg {
   msghtml: acars_msg[];
   query_time: number;
@@ -230,52 +230,25 @@ export let live_map_page = {
       this.adsb_plane_tails = [];
       // Loop through all of the planes in the new data and save them to the target object
       adsb_targets.aircraft.forEach((aircraft) => {
-        this.adsb_plane_hex.push(this.get_hex(aircraft));
+        // normalise the hex once and use it for every lookup below
+        const hex = this.get_hex(aircraft);
+        this.adsb_plane_hex.push(hex);
         this.adsb_plane_callsign.push(this.get_callsign(aircraft));
         this.adsb_plane_tails.push(this.get_tail(aircraft));
-        if (
-          this.adsb_planes[
-            aircraft.hex
-              .replace("-", "")
-              .replace(".", "")
-              .replace("~", "")
-              .toUpperCase()
-          ] == undefined
-        ) {
-          this.adsb_planes[
-            aircraft.hex
-              .replace("-", "")
-              .replace(".", "")
-              .replace("~", "")
-              .toUpperCase()
-          ] = {
+        const plane = this.adsb_planes[hex];
+        if (plane == undefined) {
+          this.adsb_planes[hex] = {
             position: aircraft,
             last_updated: this.last_updated,
-            id: aircraft.hex
-              .replace("-", "")
-              .replace(".", "")
-              .replace("~", "")
-              .toUpperCase(),
+            id: hex,
             num_messages: 0,
             position_marker: null,
             datablock_marker: null,
             icon: null,
           };
         } else {
-          this.adsb_planes[
-            aircraft.hex
-              .replace("-", "")
-              .replace(".", "")
-              .replace("~", "")
-              .toUpperCase()
-          ].position = aircraft;
-          this.adsb_planes[
-            aircraft.hex
-              .replace("-", "")
-              .replace(".", "")
-              .replace("~", "")
-              .toUpperCase()
-          ].last_updated = this.last_updated;
+          plane.position = aircraft;
+          plane.last_updated = this.last_updated;
         }
       });
       // Now loop through the target object and expire any that are no longer there
@@ -18,6 +18,24 @@
 
 from datetime import datetime, timezone
 import json
+import math
+
+try:
+    import orjson
+except ImportError:
+    # orjson dumps the decoded libacars much quicker, but it isn't required
+    orjson = None
+
+
+def libacars_dumps(libacars):
+    # the decoded libacars is stored as a JSON string on the message
+    if orjson is not None:
+        try:
+            return orjson.dumps(libacars).decode()
+        except TypeError:
+            pass
+
+    return json.dumps(libacars)
 
 
 def format_acars_message(acars_message):
@@ -128,7 +146,7 @@ def format_jaero_imsl_message(unformatted_message):
                 imsl_message["text"] = msg_text
 
             if arinc622 := acars.get("arinc622"):
-                imsl_message["libacars"] = json.dumps(arinc622)
+                imsl_message["libacars"] = libacars_dumps(arinc622)
                 if gs_addr := arinc622.get("gs_addr"):
                     imsl_message["fromaddr_decoded"] = gs_addr
 
@@ -201,7 +219,7 @@ def format_satdump_imsl_message(unformatted_message):
         imsl_message["ack"] = chr(tak).replace(chr(0x15), "!")
 
     if libacars := unformatted_message.get("libacars"):
-        imsl_message["libacars"] = json.dumps(libacars)
+        imsl_message["libacars"] = libacars_dumps(libacars)
 
     if flight := unformatted_message.get("flight"):
         imsl_message["flight"] = flight
@@ -355,7 +373,7 @@ def format_hfdl_message(unformatted_message):
                         "hfnpdu"
                     ]["acars"]["arinc622"]
     if len(libacars) > 0:
-        hfdl_message["libacars"] = json.dumps(libacars)
+        hfdl_message["libacars"] = libacars_dumps(libacars)
 
     # depa
     # dsta
@@ -375,8 +393,6 @@ def format_hfdl_message(unformatted_message):
 
 
 def formated_dumpvdl2_level(unformatted_level):
-    import math
-
     truncated = str(math.trunc((10.0**1) * unformatted_level) / (10.0**1))
 
     if str.endswith(truncated, "0"):
@@ -536,7 +552,7 @@ def format_dumpvdl2_message(unformatted_message):
         # libacars
         # use the arinc622 field, dumped as JSON
         if "arinc622" in unformatted_message["vdl2"]["avlc"]["acars"]:
-            vdlm2_message["libacars"] = json.dumps(
+            vdlm2_message["libacars"] = libacars_dumps(
                 unformatted_message["vdl2"]["avlc"]["acars"]["arinc622"]
             )
 
@@ -24,15 +24,44 @@ import acarshub_configuration  # noqa: E402
 import acarshub_logging  # noqa: E402
 from acarshub_logging import LOG_LEVEL  # noqa: E402
 import acars_formatter  # noqa: E402
+from acarshub_json import split_json_lines  # noqa: E402
 
 if not acarshub_configuration.LOCAL_TEST:
     import acarshub_rrd_database  # noqa: E402
 
 from flask_socketio import SocketIO  # noqa: E402
 from flask import Flask, render_template, request, redirect, url_for  # noqa: E402
-from threading import Thread, Event  # noqa: E402
+from threading import Thread, Event, Lock  # noqa: E402
 from collections import deque  # noqa: E402
+from queue import Queue, Empty, Full  # noqa: E402
 import time  # noqa: E402
+import sys  # noqa: E402
+import json  # noqa: E402
+import socket  # noqa: E402
+from SafeScheduler import SafeScheduler  # noqa: E402
+
+try:
+    import orjson  # noqa: E402
+except ImportError:
+    # orjson encodes the socketio packets much quicker, but it isn't required
+    orjson = None
+
+
+class SocketIOJSON:
+    # json module for socketio to encode and decode packets with orjson.
+    # Anything orjson won't encode falls back to the standard library
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            return json.dumps(obj, **kwargs)
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
 # Make the browser not cache files if running in dev mode
@@ -41,6 +70,8 @@ if acarshub_configuration.LOCAL_TEST:
 
 # turn the flask app into a socketio app
 # regarding async_handlers=True, see: https://github.com/miguelgrinberg/Flask-SocketIO/issues/348
+# websocket frames are compressed by eventlet when the browser offers permessage-deflate;
+# http_compression covers clients that fall back to long polling
 socketio = SocketIO(
     app,
     async_mode=None,
@@ -49,6 +80,9 @@ socketio = SocketIO(
     engineio_logger=False,
     ping_timeout=300,
     cors_allowed_origins="*",
+    http_compression=True,
+    compression_threshold=512,
+    json=SocketIOJSON if orjson is not None else None,
 )
 
 # scheduler thread
@@ -75,80 +109,110 @@ thread_message_listener_stop_event = Event()
 thread_database = Thread()
 thread_database_stop_event = Event()
 
-# maxlen is to keep the que from becoming ginormous
+# maxsize is to keep the que from becoming ginormous
 # the messages will be in the que all the time, even if no one is using the website
-# old messages will automatically be removed
-# Note on the que: We are adding new messages to the right
-# This means oldest messages are to the left
+# old messages will be removed by que_put to make room for new ones
+# The consumers block on get() so they wake up as soon as a message is added
+
+# que_messages stays small: it only feeds the live view, and the html thread drains it in
+# batches. If the emits fall behind, an old live message is worth nothing, so dropping the
+# oldest keeps the view current. Freshly loaded pages get list_of_recent_messages instead.
+# que_database is sized to ride out a burst, or the database being slow for a while,
+# because anything dropped from it is never saved
 
-que_messages = deque(maxlen=15)
-que_database = deque(maxlen=15)
+que_messages = Queue(maxsize=15)
+que_database = Queue(maxsize=1024)
+que_database_dropped = 0
 
-list_of_recent_messages = []  # list to store most recent msgs
 list_of_recent_messages_max = 150
+# most recent msgs. Oldest messages fall off the left once the que is full
+list_of_recent_messages = deque(maxlen=list_of_recent_messages_max)
 
-# counters for messages
-# will be reset once written to RRD
-vdlm_messages_last_minute = 0
-acars_messages_last_minute = 0
-hfdl_messages_last_minute = 0
-imsl_messages_last_minute = 0
-irdm_messages_last_minute = 0
-error_messages_last_minute = 0
+# kernel receive buffer requested for the decoder sockets. Bursts of messages will sit in the
+# kernel buffer while the listener thread catches up instead of stalling the sender.
+# The kernel clamps this to net.core.rmem_max
+receiver_socket_buffer_size = 12 * 1024 * 1024
 
-# all namespaces
 
-acars_namespaces = ["/main"]
-function_cache = dict()
+class MessageCounters:
+    # Per minute message counts for the RRD. The listeners bump them and update_rrd_db
+    # drains them; the lock makes taking the counts and zeroing them one step so nothing
+    # counted in between is lost
+
+    names = ("vdlm", "acars", "error", "hfdl", "imsl", "irdm")
 
+    def __init__(self):
+        self.lock = Lock()
+        self.counts = dict.fromkeys(self.names, 0)
 
-def get_cached(func, validSecs):
-    fname = func.__name__
+    def bump(self, name, amount=1):
+        with self.lock:
+            self.counts[name] += amount
 
-    cached, cacheTime = function_cache.get(fname, (None, None))
+    def drain(self):
+        with self.lock:
+            counts = self.counts
+            self.counts = dict.fromkeys(self.names, 0)
+        return counts
 
-    if cacheTime and time.time() - cacheTime < validSecs:
-        # print(f'using function cache for {fname}')
-        return cached
 
-    result = func()
+# counters for messages
+# will be reset once written to RRD
+messages_last_minute = MessageCounters()
+
+# the counter each listener's messages are added to
+message_counter_names = {
+    "VDLM2": "vdlm",
+    "ACARS": "acars",
+    "HFDL": "hfdl",
+    "IMSL": "imsl",
+    "IRDM": "irdm",
+}
+
+# all namespaces
+
+acars_namespaces = ["/main"]
 
-    function_cache[fname] = (result, time.time())
-    return result
+# the features and message labels sent to each client when it connects. Both come
+# from the configuration and data files read at start up, so they are built once
+
+features_enabled = {
+    "vdlm": acarshub_configuration.ENABLE_VDLM,
+    "acars": acarshub_configuration.ENABLE_ACARS,
+    "hfdl": acarshub_configuration.ENABLE_HFDL,
+    "imsl": acarshub_configuration.ENABLE_IMSL,
+    "irdm": acarshub_configuration.ENABLE_IRDM,
+    "arch": acarshub_configuration.ARCH,
+    "allow_remote_updates": acarshub_configuration.ALLOW_REMOTE_UPDATES,
+    "adsb": {
+        "enabled": acarshub_configuration.ENABLE_ADSB,
+        "lat": acarshub_configuration.ADSB_LAT,
+        "lon": acarshub_configuration.ADSB_LON,
+        "url": acarshub_configuration.ADSB_URL,
+        "bypass": acarshub_configuration.ADSB_BYPASS_URL,
+        "range_rings": acarshub_configuration.ENABLE_RANGE_RINGS,
+        "flight_tracking_url": acarshub_configuration.FLIGHT_TRACKING_URL,
+    },
+}
+
+message_labels = {"labels": acarshub_helpers.acarshub_database.get_message_label_json()}
+
+# the last system status sent to every client. init_listeners runs every minute and
+# only re-sends the status when it has changed
+last_status_broadcast = None
 
 
 def update_rrd_db():
-    global vdlm_messages_last_minute
-    global acars_messages_last_minute
-    global error_messages_last_minute
-    global hfdl_messages_last_minute
-    global imsl_messages_last_minute
-    global irdm_messages_last_minute
-
-    acarshub_rrd_database.update_db(
-        vdlm=vdlm_messages_last_minute,
-        acars=acars_messages_last_minute,
-        error=error_messages_last_minute,
-        hfdl=hfdl_messages_last_minute,
-        imsl=imsl_messages_last_minute,
-        irdm=irdm_messages_last_minute,
-    )
-    vdlm_messages_last_minute = 0
-    acars_messages_last_minute = 0
-    error_messages_last_minute = 0
-    hfdl_messages_last_minute = 0
-    imsl_messages_last_minute = 0
-    irdm_messages_last_minute = 0
+    acarshub_rrd_database.update_db(**messages_last_minute.drain())
 
 
 def generateClientMessage(message_type, json_message):
-    import copy
-
-    # creating a copy so that our changes below aren't made to the passed object
-    client_message = copy.deepcopy(json_message)
+    # creating a copy so that our changes below aren't made to the passed object.
+    # update_keys only adds, replaces or deletes top level keys, so a shallow copy is enough
+    client_message = dict(json_message)
 
     # add in the message_type key because the parent object didn't have it
-    client_message.update({"message_type": message_type})
+    client_message["message_type"] = message_type
 
     # enrich message using udpate_keys
     acarshub_helpers.update_keys(client_message)
@@ -156,39 +220,68 @@ def generateClientMessage(message_type, json_message):
     return client_message
 
 
+# que type for each listener's message type. Anything else is passed through as is
+que_types = {
+    "VDLM2": "VDL-M2",
+    "ACARS": "ACARS",
+    "HFDL": "HFDL",
+    "IMSL": "IMS-L",
+    "IRDM": "IRDM",
+}
+
+
 def getQueType(message_type):
-    if message_type == "VDLM2":
-        return "VDL-M2"
-    elif message_type == "ACARS":
-        return "ACARS"
-    elif message_type == "HFDL":
-        return "HFDL"
-    elif message_type == "IMSL":
-        return "IMS-L"
-    elif message_type == "IRDM":
-        return "IRDM"
-    elif message_type is not None:
-        return str(message_type)
-    else:
+    if message_type is None:
         return "UNKNOWN"
 
+    return que_types.get(message_type) or str(message_type)
+
+
+def que_put(que, item):
+    # Add to the que, throwing away the oldest message if it is full
+    # Returns True if a message had to be thrown away
+    dropped = False
+
+    while True:
+        try:
+            que.put_nowait(item)
+            return dropped
+        except Full:
+            try:
+                que.get_nowait()
+                dropped = True
+            except Empty:
+                pass
+
 
 def htmlListener():
-    import time
-    import sys
+    stopped = thread_html_generator_event.is_set
 
     # Run while requested...
-    while not thread_html_generator_event.is_set():
-        sys.stdout.flush()
-        time.sleep(1)
-
-        while len(que_messages) != 0:
-            message_source, json_message = que_messages.popleft()
+    while not stopped():
+        # the timeout is only so the stop event gets checked
+        try:
+            # messages are already formatted for the client by message_listener
+            client_messages = [que_messages.get(timeout=1)]
+        except Empty:
+            continue
 
-            client_message = generateClientMessage(message_source, json_message)
+        # anything else already waiting goes out in the same event
+        while True:
+            try:
+                client_messages.append(que_messages.get_nowait())
+            except Empty:
+                break
 
-            socketio.emit("acars_msg", {"msghtml": client_message}, namespace="/main")
-            # acarshub_logging.log(f"EMIT: {client_message}", "htmlListener", level=LOG_LEVEL["DEBUG"])
+        if len(client_messages) == 1:
+            socketio.emit(
+                "acars_msg", {"msghtml": client_messages[0]}, namespace="/main"
+            )
+        else:
+            socketio.emit(
+                "acars_msg_batch", {"messages": client_messages}, namespace="/main"
+            )
+        # acarshub_logging.log(f"EMIT: {client_message}", "htmlListener", level=LOG_LEVEL["DEBUG"])
 
     acarshub_logging.log(
         "Exiting HTML Listener thread", "htmlListener", level=LOG_LEVEL["DEBUG"]
@@ -196,17 +289,17 @@ def htmlListener():
 
 
 def scheduled_tasks():
-    from SafeScheduler import SafeScheduler
-    import time
-
     schedule = SafeScheduler()
-    # init the dbs if not already there
-    acarshub_configuration.check_github_version()
+    # The version check goes out to github, so it runs in its own task rather than holding
+    # up the rest of the scheduled jobs while it waits on the network
+    socketio.start_background_task(acarshub_configuration.check_github_version)
     if not acarshub_configuration.LOCAL_TEST:
         schedule.every().minute.at(":15").do(acarshub_helpers.service_check)
         schedule.every().minute.at(":00").do(update_rrd_db)
 
-    schedule.every().hour.at(":05").do(acarshub_configuration.check_github_version)
+    schedule.every().hour.at(":05").do(
+        socketio.start_background_task, acarshub_configuration.check_github_version
+    )
     schedule.every().hour.at(":01").do(send_version)
     schedule.every().minute.at(":30").do(
         acarshub_helpers.acarshub_database.prune_database
@@ -217,27 +310,35 @@ def scheduled_tasks():
         init_listeners, "Error encountered! Restarting... "
     )
 
-    while not thread_scheduler_stop_event.is_set():
+    stopped = thread_scheduler_stop_event.is_set
+
+    while not stopped():
         schedule.run_pending()
-        time.sleep(1)
+        # sleep until the next job is due instead of waking every second to check.
+        # Waiting on the stop event means setting it still ends the loop straight away
+        idle_seconds = schedule.idle_seconds
+        thread_scheduler_stop_event.wait(
+            1 if idle_seconds is None else max(idle_seconds, 0)
+        )
 
 
 def database_listener():
-    import sys
-    import time
-
-    while not thread_database_stop_event.is_set():
-        sys.stdout.flush()
-        time.sleep(1)
-
-        while len(que_database) != 0:
-            sys.stdout.flush()
-            message_type, message_as_json = que_database.pop()
-            acarshub_helpers.acarshub_database.add_message_from_json(
-                message_type=message_type, message_from_json=message_as_json
-            )
-        else:
-            pass
+    stopped = thread_database_stop_event.is_set
+
+    while not stopped():
+        try:
+            messages = [que_database.get(timeout=1)]
+        except Empty:
+            continue
+
+        # anything else already waiting goes in to the database in the same transaction
+        while True:
+            try:
+                messages.append(que_database.get_nowait())
+            except Empty:
+                break
+
+        acarshub_helpers.acarshub_database.add_messages_from_json(messages)
 
 
 def message_listener(message_type=None, ip="127.0.0.1", port=None):
@@ -247,194 +348,146 @@ def message_listener(message_type=None, ip="127.0.0.1", port=None):
         )
         return
 
-    import time
-    import socket
-    import json
+    global que_database_dropped
 
-    global error_messages_last_minute
+    counter_name = message_counter_names.get(message_type)
 
-    if message_type == "VDLM2":
-        global vdlm_messages_last_minute
-    elif message_type == "ACARS":
-        global acars_messages_last_minute
-    elif message_type == "HFDL":
-        global hfdl_messages_last_minute
-    elif message_type == "IMSL":
-        global imsl_messages_last_minute
-    elif message_type == "IRDM":
-        global irdm_messages_last_minute
+    # message_type doesn't change for the life of the listener, so build the names used
+    # in the log lines once
+    listener_name = message_type.lower()
+    log_source = f"{listener_name}Generator"
 
     disconnected = True
 
+    # Only one connection per decoder type. The *_server services relay the decoder
+    # output with `ncat --keep-open`, which sends every line to every connected client,
+    # so spreading a decoder over multiple sockets/threads would duplicate each message.
     receiver = socket.socket(family=socket.AF_INET, type=socket.SOCK_STREAM)
 
     acarshub_logging.log(
-        f"message_listener starting: {message_type.lower()}",
+        f"message_listener starting: {listener_name}",
         "message_listener",
         level=LOG_LEVEL["DEBUG"],
     )
 
-    partial_message = None
+    # every message from this listener goes in to the same que
+    que_type = getQueType(message_type)
+
+    # bytes from the end of the last read that didn't make up a whole message yet
+    leftover = b""
+
+    # Receive buffer is allocated once and reused for every read on this listener
+    # rather than allocating a fresh 64k bytes object per message
+    receive_buffer = bytearray(65527)
+    receive_view = memoryview(receive_buffer)
+
+    # is_set is looked up once here rather than on every pass of the loop
+    stopped = thread_message_listener_stop_event.is_set
 
     # Run while requested...
-    while not thread_message_listener_stop_event.is_set():
+    while not stopped():
         data = None
 
         # acarshub_logging.log(f"recv_from ...", "message_listener", level=LOG_LEVEL["DEBUG"])
         try:
             if disconnected:
                 receiver = socket.socket(family=socket.AF_INET, type=socket.SOCK_STREAM)
+                # Set the receive buffer before connecting so the TCP window is sized from it
+                receiver.setsockopt(
+                    socket.SOL_SOCKET, socket.SO_RCVBUF, receiver_socket_buffer_size
+                )
                 # Set socket timeout 1 seconds
                 receiver.settimeout(1)
 
                 # Connect to the sender
                 receiver.connect((ip, port))
                 disconnected = False
+                # nothing from the old connection can complete a message on the new one
+                leftover = b""
                 acarshub_logging.log(
-                    f"{message_type.lower()}_receiver connected to {ip}:{port}",
-                    f"{message_type.lower()}Generator",
+                    f"{listener_name}_receiver connected to {ip}:{port}",
+                    log_source,
+                    level=LOG_LEVEL["DEBUG"],
+                )
+                acarshub_logging.log(
+                    f"{listener_name}_receiver buffer size: {receiver.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)} bytes",
+                    log_source,
                     level=LOG_LEVEL["DEBUG"],
                 )
 
+            # the socket is connected, so there's no need for recvfrom to build the peer address
             if acarshub_configuration.LOCAL_TEST is True:
-                data, addr = receiver.recvfrom(65527)
+                nbytes = receiver.recv_into(receive_buffer, 65527)
             else:
-                data, addr = receiver.recvfrom(65527, socket.MSG_WAITALL)
+                nbytes = receiver.recv_into(receive_buffer, 65527, socket.MSG_WAITALL)
+
+            data = receive_view[:nbytes]
 
         except socket.timeout:
             continue
-        except socket.error as e:
+        except Exception as e:
+            # socket errors and anything unexpected are handled the same way: drop the
+            # connection and reconnect on the next pass
             acarshub_logging.log(
                 f"Error to {ip}:{port}. Reattempting...",
-                f"{message_type.lower()}Generator",
+                log_source,
                 level=LOG_LEVEL["ERROR"],
             )
-            acarshub_logging.acars_traceback(e, f"{message_type.lower()}Generator")
-            disconnected = True
-            receiver.close()
-            time.sleep(1)
-            continue
-        except Exception as e:
-            acarshub_logging.acars_traceback(e, f"{message_type.lower()}Generator")
+            acarshub_logging.acars_traceback(e, log_source)
             disconnected = True
             receiver.close()
             time.sleep(1)
             continue
 
-        # acarshub_logging.log(f"{message_type.lower()}: got data", "message_listener", level=LOG_LEVEL["DEBUG"])
+        # acarshub_logging.log(f"{listener_name}: got data", "message_listener", level=LOG_LEVEL["DEBUG"])
 
-        if data is not None:
-            decoded = data.decode()
-        else:
-            decoded = ""
-
-        if decoded == "":
+        if data is None or len(data) == 0:
             disconnected = True
             receiver.close()
             continue
 
         # Decode json
-        # There is a rare condition where we'll receive two messages at once
-        # We will cover this condition off by ensuring each json message is
-        # broken apart and handled individually
-
-        # acarsdec or vdlm2dec single message ends with a newline so no additional processing required
-        # acarsdec or vdlm2dec multi messages ends with a newline and each message has a newline but the decoder
-        # breaks with more than one JSON object
-
-        # in case of back to back objects, add a newline to split on
-        decoded = decoded.replace("}{", "}\n{")
-
-        # split on newlines
-        split_json = decoded.splitlines()
-
-        # try and reassemble messages that were received separately
-        if partial_message is not None and len(split_json) > 0:
-            combined = partial_message + split_json[0]
-
-            try:
-                # check if we can decode the json
-                json.loads(combined)
-
-                # no exception, json decoded fine, reassembly succeeded
-                # replace the first string in the list with the reassembled string
-                split_json[0] = combined
-                acarshub_logging.log(
-                    "Reassembly successful, message not skipped after all!",
-                    f"{message_type.lower()}Generator",
-                    level=LOG_LEVEL["DEBUG"]
-                )
-            except Exception as e:
-                # reassembly didn't work, don't do anything but print an error when debug is enabled
-                acarshub_logging.log(
-                    f"Reassembly failed {e}: {combined}",
-                    f"{message_type.lower()}Generator",
-                    level=LOG_LEVEL["WARNING"]
-                )
+        # A single read can hold several messages, or only part of one. Anything left
+        # over from the last read is put back in front before splitting the objects out.
+        # This also copies the data out of the receive buffer before the next read reuses it
+        messages, leftover = split_json_lines(leftover + data, log_source)
 
-            # forget the partial message, it can't be useful anymore
-            partial_message = None
-
-        for part in split_json:
-            # acarshub_logging.log(f"{message_type.lower()}: part: {part}", "message_listener", level=LOG_LEVEL["DEBUG"])
-
-            if len(part) == 0:
-                continue
-
-            msg = None
-            try:
-                msg = json.loads(part)
-            except ValueError:
-                if part == split_json[-1]:
-                    # last element in the list, could be a partial json object
-                    partial_message = part
-                acarshub_logging.log(
-                    f"Skipping Message: {part}", f"{message_type.lower()}Generator", LOG_LEVEL["DEBUG"]
-                )
-                continue
-            except Exception as e:
-                acarshub_logging.log(
-                    f"Unknown Error with JSON input: {e}",
-                    f"{message_type.lower()}Generator",
-                    level=LOG_LEVEL["ERROR"],
-                )
-                acarshub_logging.acars_traceback(e, f"{message_type.lower()}Generator")
-                continue
-
-            que_type = getQueType(message_type)
+        if len(leftover) > len(receive_buffer):
+            # a message this big is garbage, not a split read. Don't keep growing it
+            acarshub_logging.log(
+                f"Dropping unterminated message: {leftover[:200]}",
+                log_source,
+                level=LOG_LEVEL["WARNING"],
+            )
+            leftover = b""
 
+        for msg in messages:
             formatted_message = acars_formatter.format_acars_message(msg)
 
             if formatted_message:
-                if message_type == "VDLM2":
-                    vdlm_messages_last_minute += 1
-                elif message_type == "ACARS":
-                    acars_messages_last_minute += 1
-                elif message_type == "HFDL":
-                    hfdl_messages_last_minute += 1
-                elif message_type == "IMSL":
-                    imsl_messages_last_minute += 1
-                elif message_type == "IRDM":
-                    irdm_messages_last_minute += 1
+                if counter_name is not None:
+                    messages_last_minute.bump(counter_name)
 
                 if "error" in msg:
                     if msg["error"] > 0:
-                        error_messages_last_minute += msg["error"]
+                        messages_last_minute.bump("error", msg["error"])
 
-                que_messages.append((que_type, formatted_message))
-                que_database.append((que_type, formatted_message))
+                # enrich the message for the front end once. The same object is sent to the
+                # connected clients and kept for anyone fresh loading the page
+                client_message = generateClientMessage(que_type, formatted_message)
 
-                if (
-                    len(list_of_recent_messages) >= list_of_recent_messages_max
-                ):  # Keep the que size down
-                    del list_of_recent_messages[0]
+                que_put(que_messages, client_message)
 
-                if not acarshub_configuration.QUIET_MESSAGES:
-                    print(f"MESSAGE:{message_type.lower()}Generator: {msg}")
+                if que_put(que_database, (que_type, formatted_message)):
+                    que_database_dropped += 1
+                    acarshub_logging.log(
+                        f"Database que full, dropped the oldest message ({que_database_dropped} dropped so far)",
+                        log_source,
+                        level=LOG_LEVEL["WARNING"],
+                    )
 
-                client_message = generateClientMessage(
-                    que_type, formatted_message
-                )
+                if not acarshub_configuration.QUIET_MESSAGES:
+                    print(f"MESSAGE:{log_source}: {msg}")
 
                 # add to recent message que for anyone fresh loading the page
                 list_of_recent_messages.append(client_message)
@@ -453,6 +506,7 @@ def init_listeners(special_message=""):
     global thread_html_generator
     global thread_adsb_listner
     global thread_adsb
+    global last_status_broadcast
     # REMOVE AFTER AIRFRAMES IS UPDATED ####
     global vdlm2_feeder_thread
     global acars_feeder_thread
@@ -573,13 +627,23 @@ def init_listeners(special_message=""):
 
     status = acarshub_helpers.get_service_status()  # grab system status
 
+    # clients are sent the current status when they connect, so there is no need to
+    # send it again if it is the same as the last one
+    status_json = json.dumps(status, sort_keys=True)
+    if status_json == last_status_broadcast:
+        return
+    last_status_broadcast = status_json
+
     # emit to all namespaces
     for page in acars_namespaces:
         socketio.emit("system_status", {"status": status}, namespace=page)
 
 
 def init():
-    global list_of_recent_messages
+    # stdout is a pipe under docker, so have print flush on each newline instead of
+    # the worker threads flushing it by hand
+    sys.stdout.reconfigure(line_buffering=True)
+
     # grab recent messages from db and fill the most recent array
     # then turn on the listeners
     acarshub_logging.log("Grabbing most recent messages from database", "init")
@@ -607,7 +671,7 @@ def init():
                 que_type = getQueType(json_message["message_type"])
 
                 client_message = generateClientMessage(que_type, json_message)
-                list_of_recent_messages.insert(0, client_message)
+                list_of_recent_messages.appendleft(client_message)
 
             except Exception as e:
                 acarshub_logging.log(
@@ -689,147 +753,63 @@ def not_found(e):
 @socketio.on("connect", namespace="/main")
 def main_connect():
     pt = time.time()
-    import sys
-
-    # need visibility of the global thread object
-    global thread_html_generator
-    global thread_adsb
-    global thread_adsb_stop_event
-
-    recent_options = {"loading": True, "done_loading": False}
 
     requester = request.sid
 
-    try:
-        socketio.emit(
-            "features_enabled",
-            {
-                "vdlm": acarshub_configuration.ENABLE_VDLM,
-                "acars": acarshub_configuration.ENABLE_ACARS,
-                "hfdl": acarshub_configuration.ENABLE_HFDL,
-                "imsl": acarshub_configuration.ENABLE_IMSL,
-                "irdm": acarshub_configuration.ENABLE_IRDM,
-                "arch": acarshub_configuration.ARCH,
-                "allow_remote_updates": acarshub_configuration.ALLOW_REMOTE_UPDATES,
-                "adsb": {
-                    "enabled": acarshub_configuration.ENABLE_ADSB,
-                    "lat": acarshub_configuration.ADSB_LAT,
-                    "lon": acarshub_configuration.ADSB_LON,
-                    "url": acarshub_configuration.ADSB_URL,
-                    "bypass": acarshub_configuration.ADSB_BYPASS_URL,
-                    "range_rings": acarshub_configuration.ENABLE_RANGE_RINGS,
-                    "flight_tracking_url": acarshub_configuration.FLIGHT_TRACKING_URL,
-                },
-            },
-            to=requester,
-            namespace="/main",
-        )
+    # Everything a new client needs is sent in one connect_bundle event. Each part is
+    # keyed by the event it used to be sent as, and the client hands the parts to those
+    # events' handlers in this order. A part that fails is left out and logged
+    bundle = {"features_enabled": features_enabled}
 
-        socketio.emit(
-            "terms",
-            {
-                "terms": acarshub_helpers.acarshub_database.get_alert_terms(),
-                "ignore": acarshub_helpers.acarshub_database.get_alert_ignore(),
-            },
-            to=requester,
-            namespace="/main",
-        )
+    try:
+        bundle["terms"] = {
+            "terms": acarshub_helpers.acarshub_database.get_alert_terms(),
+            "ignore": acarshub_helpers.acarshub_database.get_alert_ignore(),
+        }
     except Exception as e:
-        acarshub_logging.log(
-            f"Main Connect: Error sending features_enabled: {e}", "webapp"
-        )
+        acarshub_logging.log(f"Main Connect: Error getting terms: {e}", "webapp")
         acarshub_logging.acars_traceback(e, "webapp")
 
+    bundle["labels"] = message_labels
+
+    bundle["acars_msg_batch"] = {
+        "messages": list(list_of_recent_messages),
+        "loading": True,
+        "done_loading": True,
+    }
+
+    bundle["system_status"] = {"status": acarshub_helpers.get_service_status()}
+
     try:
-        socketio.emit(
-            "labels",
-            {"labels": acarshub_helpers.acarshub_database.get_message_label_json()},
-            to=requester,
-            namespace="/main",
-        )
+        rows, size = acarshub_helpers.acarshub_database.database_get_row_count()
+        bundle["database"] = {"count": rows, "size": size}
     except Exception as e:
-        acarshub_logging.log(f"Main Connect: Error sending labels: {e}", "webapp")
+        acarshub_logging.log(f"Main Connect: Error getting database: {e}", "webapp")
         acarshub_logging.acars_traceback(e, "webapp")
 
-    msg_index = 1
-    for json_message in list_of_recent_messages:
-        if msg_index == len(list_of_recent_messages):
-            recent_options["done_loading"] = True
-        msg_index += 1
-        try:
-            socketio.emit(
-                "acars_msg",
-                {
-                    "msghtml": json_message,
-                    **recent_options,
-                },
-                to=requester,
-                namespace="/main",
-            )
-        except Exception as e:
-            acarshub_logging.log(
-                f"Main Connect: Error sending acars_msg: {e}", "webapp"
-            )
-            acarshub_logging.acars_traceback(e, "webapp")
-
     try:
-        socketio.emit(
-            "system_status",
-            {"status": acarshub_helpers.get_service_status()},
-            to=requester,
-            namespace="/main",
-        )
+        bundle["signal"] = {
+            "levels": acarshub_helpers.acarshub_database.get_signal_levels()
+        }
+        bundle["alert_terms"] = {
+            "data": acarshub_helpers.acarshub_database.get_alert_counts()
+        }
     except Exception as e:
         acarshub_logging.log(
-            f"Main Connect: Error sending system_status: {e}", "webapp"
+            f"Main Connect: Error getting signal levels: {e}", "webapp"
         )
         acarshub_logging.acars_traceback(e, "webapp")
 
-    try:
-        rows, size = get_cached(
-            acarshub_helpers.acarshub_database.database_get_row_count, 30
-        )
-        socketio.emit(
-            "database", {"count": rows, "size": size}, to=requester, namespace="/main"
-        )
-    except Exception as e:
-        acarshub_logging.log(f"Main Connect: Error sending database: {e}", "webapp")
-        acarshub_logging.acars_traceback(e, "webapp")
+    bundle["acarshub-version"] = acarshub_configuration.get_version()
 
     try:
-        socketio.emit(
-            "signal",
-            {
-                "levels": get_cached(
-                    acarshub_helpers.acarshub_database.get_signal_levels, 30
-                )
-            },
-            to=requester,
-            namespace="/main",
-        )
-        socketio.emit(
-            "alert_terms",
-            {
-                "data": get_cached(
-                    acarshub_helpers.acarshub_database.get_alert_counts, 30
-                )
-            },
-            to=requester,
-            namespace="/main",
-        )
-        send_version()
+        socketio.emit("connect_bundle", bundle, to=requester, namespace="/main")
     except Exception as e:
         acarshub_logging.log(
-            f"Main Connect: Error sending signal levels: {e}", "webapp"
+            f"Main Connect: Error sending connect_bundle: {e}", "webapp"
         )
         acarshub_logging.acars_traceback(e, "webapp")
 
-    # Start the htmlGenerator thread only if the thread has not been started before.
-    if not hasattr(thread_html_generator, "g"):
-        sys.stdout.flush()
-        thread_html_generator_event.clear()
-        thread_html_generator = socketio.start_background_task(htmlListener)
-
     pt = time.time() - pt
     acarshub_logging.log(
         f"main_connect took {pt * 1000:.0f}ms", "htmlListener", level=LOG_LEVEL["DEBUG"]
@@ -845,22 +825,23 @@ def get_alerts(message, namespace):
         flight=message["flight"],
         tail=message["tail"],
     )
-    if results is not None:
-        results.reverse()
-
-    recent_options = {"loading": True, "done_loading": False}
-    msg_index = 1
-    for item in [item for item in (results or [])]:
-        if msg_index == len(results):
-            recent_options["done_loading"] = True
-        msg_index += 1
+    if not results:
+        return
+
+    for item in results:
         acarshub_helpers.update_keys(item)
-        socketio.emit(
-            "alert_matches",
-            {"msghtml": item, **recent_options},
-            to=requester,
-            namespace="/main",
-        )
+
+    # send every match in one go, oldest first
+    socketio.emit(
+        "alert_matches_batch",
+        {
+            "messages": list(reversed(results)),
+            "loading": True,
+            "done_loading": True,
+        },
+        to=requester,
+        namespace="/main",
+    )
 
 
 @socketio.on("update_alerts", namespace="/main")
@@ -899,7 +880,7 @@ def request_count(message, namespace):
     requester = request.sid
     socketio.emit(
         "signal_count",
-        {"count": get_cached(acarshub_helpers.acarshub_database.get_errors, 30)},
+        {"count": acarshub_helpers.acarshub_database.get_errors()},
         to=requester,
         namespace="/main",
     )
@@ -917,17 +898,14 @@ def request_graphs(message, namespace):
     requester = request.sid
     socketio.emit(
         "alert_terms",
-        {"data": get_cached(acarshub_helpers.acarshub_database.get_alert_counts, 30)},
+        {"data": acarshub_helpers.acarshub_database.get_alert_counts()},
         to=requester,
         namespace="/main",
     )
     socketio.emit(
         "signal",
-        {
-            "levels": get_cached(
-                acarshub_helpers.acarshub_database.get_signal_levels, 30
-            )
-        },
+        {"levels": acarshub_helpers.acarshub_database.get_signal_levels()},
+        to=requester,
         namespace="/main",
     )
     pt = time.time() - pt
@@ -943,8 +921,6 @@ def request_graphs(message, namespace):
 
 @socketio.on("query_search", namespace="/main")
 def handle_message(message, namespace):
-    import time
-
     start_time = time.time()
     # We are going to send the result over in one blob
     # search.js will only maintain the most recent blob we send over
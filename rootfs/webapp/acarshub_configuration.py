@@ -238,7 +238,8 @@ def check_github_version():
     if not LOCAL_TEST:
         try:
             operUrl = urllib.request.urlopen(
-                "https://api.github.com/repos/sdr-enthusiasts/docker-acarshub/releases/latest"
+                "https://api.github.com/repos/sdr-enthusiasts/docker-acarshub/releases/latest",
+                timeout=10,
             )
             if operUrl.getcode() == 200:
                 data = operUrl.read()
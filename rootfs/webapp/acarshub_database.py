@@ -37,6 +37,10 @@ import acarshub_logging
 from acarshub_logging import LOG_LEVEL
 import re
 import os
+import sys
+import time
+import functools
+from collections import OrderedDict
 
 groundStations = dict()  # dictionary of all ground stations
 alert_terms = list()  # dictionary of all alert terms monitored
@@ -73,6 +77,40 @@ except Exception as e:
     message_labels = {"labels": {}}  # handle URL exception
     acarshub_logging.acars_traceback(e, "database")
 
+
+def ttl_cache(seconds, maxsize=16):
+    # Cache a function's results for `seconds`, keyed on its arguments.
+    # An entry's age is only reset when it is refreshed, not when it is read, so the
+    # result is never more than `seconds` old however often the page asks for it.
+    # Call func.cache_clear() when the underlying data is known to have changed
+    def decorator(func):
+        cache = OrderedDict()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            cached = cache.get(key)
+
+            if cached is not None and now - cached[1] < seconds:
+                return cached[0]
+
+            result = func(*args, **kwargs)
+            cache[key] = (result, now)
+            cache.move_to_end(key)
+
+            # drop the least recently refreshed entries
+            while len(cache) > maxsize:
+                cache.popitem(last=False)
+
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
+
+
 # DB PATH MUST BE FROM ROOT!
 # default database
 db_path = acarshub_configuration.ACARSHUB_DB
@@ -99,6 +137,13 @@ except Exception as e:
     airlines = {}
     acarshub_logging.acars_traceback(e, database)
 
+# ICAO airline code to the first IATA code using it, so looking up an ICAO callsign
+# doesn't have to walk every airline
+
+airlines_by_icao = {}
+for iata, airline in airlines.items():
+    airlines_by_icao.setdefault(airline["ICAO"], iata)
+
 
 # Set up the override IATA/ICAO callsigns
 # Input format needs to be IATA|ICAO|Airline Name
@@ -267,8 +312,6 @@ if backup:
 
 inspector = Inspector.from_engine(database)
 if "messages_fts" not in inspector.get_table_names():
-    import sys
-
     acarshub_logging.log(
         "Missing FTS TABLE! Aborting!", "database", level=LOG_LEVEL["ERROR"]
     )
@@ -310,21 +353,21 @@ finally:
     session.close()
 
 
+# column names for each table class, looked up the first time a row of it is converted
+query_columns = dict()
+
+
 def query_to_dict(obj):
     if isinstance(obj.__class__, DeclarativeMeta):
-        # an SQLAlchemy class
-        fields = {}
-        for field in [
-            x
-            for x in dir(obj)
-            if not x.startswith("_")
-            and x != "metadata"
-            and x is not None
-            and x != ""
-            and x != "registry"
-        ]:
-            fields[field] = obj.__getattribute__(field)
-        return fields
+        # an SQLAlchemy class. Read the mapped columns rather than walking dir() of the
+        # object, which built and sorted the full attribute list for every row
+        columns = query_columns.get(obj.__class__)
+
+        if columns is None:
+            columns = [column.key for column in obj.__mapper__.column_attrs]
+            query_columns[obj.__class__] = columns
+
+        return {column: getattr(obj, column) for column in columns}
     return None
 
 
@@ -492,100 +535,106 @@ def create_db_safe_params(message_from_json):
     return params
 
 
-def add_message(params, message_type, message_from_json, backup=False):
-    global database
+def write_message(session, params, message_type, message_from_json):
+    # Add the message and update the stats in the given session. Committing is left to
+    # the caller so a batch of messages can share one transaction
     global alert_terms
 
-    try:
-        if backup:
-            session = db_session_backup()
-        else:
-            session = db_session()
-
-        update_frequencies(params["freq"], message_type, session)
-        if acarshub_configuration.DB_SAVEALL or is_message_not_empty(message_from_json):
-            # write the message
-            session.add(messages(message_type=message_type, **params))
+    update_frequencies(params["freq"], message_type, session)
+    if acarshub_configuration.DB_SAVEALL or is_message_not_empty(message_from_json):
+        # write the message
+        session.add(messages(message_type=message_type, **params))
 
-        # Now lets decide where to log the message count to
-        # First we'll see if the message is not blank
+    # Now lets decide where to log the message count to
+    # First we'll see if the message is not blank
 
-        if is_message_not_empty(message_from_json):
-            count = session.query(messagesCount).first()
-            if count is not None:
-                count.total += 1
+    if is_message_not_empty(message_from_json):
+        count = session.query(messagesCount).first()
+        if count is not None:
+            count.total += 1
 
-                if params["error"] > 0:
-                    count.errors += 1
-                else:
-                    count.good += 1
+            if params["error"] > 0:
+                count.errors += 1
             else:
-                session.add(
-                    messagesCount(
-                        total=1,
-                        good=0 if params["error"] > 0 else 1,
-                        errors=1 if params["error"] > 0 else 0,
-                    )
+                count.good += 1
+        else:
+            session.add(
+                messagesCount(
+                    total=1,
+                    good=0 if params["error"] > 0 else 1,
+                    errors=1 if params["error"] > 0 else 0,
                 )
+            )
 
-        else:
-            count = session.query(messagesCountDropped).first()
-            if count is not None:
-                if params["error"] > 0:
-                    count.nonlogged_errors += 1
-                else:
-                    count.nonlogged_good += 1
+    else:
+        count = session.query(messagesCountDropped).first()
+        if count is not None:
+            if params["error"] > 0:
+                count.nonlogged_errors += 1
             else:
-                session.add(
-                    messagesCountDropped(
-                        nonlogged_good=1 if params["error"] == 0 else 0,
-                        nonlogged_errors=1 if params["error"] > 0 else 0,
-                    )
+                count.nonlogged_good += 1
+        else:
+            session.add(
+                messagesCountDropped(
+                    nonlogged_good=1 if params["error"] == 0 else 0,
+                    nonlogged_errors=1 if params["error"] > 0 else 0,
                 )
+            )
 
-        # Log the level count
-        # We'll see if the level is in the database already, and if so, increment the counter
-        # If not, we'll add it in
+    # Log the level count
+    # We'll see if the level is in the database already, and if so, increment the counter
+    # If not, we'll add it in
 
-        found_level = (
-            session.query(messagesLevel)
-            .filter(messagesLevel.level == params["level"])
-            .first()
-        )
+    found_level = (
+        session.query(messagesLevel)
+        .filter(messagesLevel.level == params["level"])
+        .first()
+    )
 
-        if found_level is not None:
-            found_level.count += 1
-        else:
-            session.add(messagesLevel(level=params["level"], count=1))
-
-        if len(params["text"]) > 0 and alert_terms:
-            for search_term in alert_terms:
-                if re.findall(r"\b{}\b".format(search_term), params["text"]):
-                    should_add = True
-                    for ignore_term in alert_terms_ignore:
-                        if re.findall(r"\b{}\b".format(ignore_term), params["text"]):
-                            should_add = False
-                            break
-                    if should_add:
-                        found_term = (
-                            session.query(alertStats)
-                            .filter(alertStats.term == search_term.upper())
-                            .first()
-                        )
-                        if found_term is not None:
-                            found_term.count += 1
-                        else:
-                            session.add(alertStats(term=search_term.upper(), count=1))
-
-                        session.add(
-                            messages_saved(
-                                message_type=message_type,
-                                **params,
-                                term=search_term.upper(),
-                                type_of_match="text",
-                            )
+    if found_level is not None:
+        found_level.count += 1
+    else:
+        session.add(messagesLevel(level=params["level"], count=1))
+
+    if len(params["text"]) > 0 and alert_terms:
+        for search_term in alert_terms:
+            if re.findall(r"\b{}\b".format(search_term), params["text"]):
+                should_add = True
+                for ignore_term in alert_terms_ignore:
+                    if re.findall(r"\b{}\b".format(ignore_term), params["text"]):
+                        should_add = False
+                        break
+                if should_add:
+                    found_term = (
+                        session.query(alertStats)
+                        .filter(alertStats.term == search_term.upper())
+                        .first()
+                    )
+                    if found_term is not None:
+                        found_term.count += 1
+                    else:
+                        session.add(alertStats(term=search_term.upper(), count=1))
+
+                    session.add(
+                        messages_saved(
+                            message_type=message_type,
+                            **params,
+                            term=search_term.upper(),
+                            type_of_match="text",
                         )
-                        session.commit()
+                    )
+
+
+def add_message(params, message_type, message_from_json, backup=False):
+    global database
+
+    try:
+        if backup:
+            session = db_session_backup()
+        else:
+            session = db_session()
+
+        write_message(session, params, message_type, message_from_json)
 
         # commit the db change and close the session
         session.commit()
@@ -596,6 +645,36 @@ def add_message(params, message_type, message_from_json, backup=False):
             session.close()
 
 
+def add_messages(message_list, backup=False):
+    # Write a list of (message_type, params, message_from_json) in one transaction. The
+    # commit is most of the cost of a write with SQLite, so it is only paid once per batch.
+    # If anything in the batch fails it is all rolled back and the messages are written
+    # one at a time instead, so one bad message doesn't lose the rest
+    session = None
+
+    try:
+        if backup:
+            session = db_session_backup()
+        else:
+            session = db_session()
+
+        for message_type, params, message_from_json in message_list:
+            write_message(session, params, message_type, message_from_json)
+
+        session.commit()
+        return
+    except Exception as e:
+        acarshub_logging.acars_traceback(e, "database")
+        if session:
+            session.rollback()
+    finally:
+        if session:
+            session.close()
+
+    for message_type, params, message_from_json in message_list:
+        add_message(params, message_type, message_from_json, backup=backup)
+
+
 def add_message_from_json(message_type, message_from_json):
     # message time
     # all fields are set to a blank string. This is because all of the database fields
@@ -606,6 +685,18 @@ def add_message_from_json(message_type, message_from_json):
         add_message(params, message_type, message_from_json, backup=True)
 
 
+def add_messages_from_json(message_list):
+    # Same as add_message_from_json, for a list of (message_type, message_from_json)
+    # written in a single transaction
+    batch = [
+        (message_type, create_db_safe_params(message_from_json), message_from_json)
+        for message_type, message_from_json in message_list
+    ]
+    add_messages(batch)
+    if backup:
+        add_messages(batch, backup=True)
+
+
 def find_airline_code_from_iata(iata):
     if iata in overrides:
         return overrides[iata]
@@ -618,13 +709,28 @@ def find_airline_code_from_iata(iata):
 
 def find_airline_code_from_icao(icao):
     # FIXME: this is complete shit and we need to do IATA/ICAO stuff better
-    for iata in airlines:
-        if airlines[iata]["ICAO"] == icao:
-            return (iata, airlines[iata]["NAME"])
+    if icao in airlines_by_icao:
+        iata = airlines_by_icao[icao]
+        return (iata, airlines[iata]["NAME"])
 
     return (icao, "UNKNOWN AIRLINE")
 
 
+# Paging through a search asks for the same total on every page, so it is cached the
+# same way as the other counts
+@ttl_cache(30, maxsize=64)
+def count_search_matches(match_string):
+    session = db_session()
+    try:
+        return session.execute(
+            text(
+                f"SELECT COUNT(*) FROM messages_fts WHERE messages_fts MATCH {match_string}"
+            )
+        ).scalar()
+    finally:
+        session.close()
+
+
 # FIXME: Rolled back to old database_search. Should wrap FTS table in SQL Alchemy engine
 def database_search(search_term, page=0):
     result = None
@@ -695,24 +801,17 @@ def database_search(search_term, page=0):
             )
         )
 
-        count = session.execute(
-            text(
-                f"SELECT COUNT(*) FROM messages_fts WHERE messages_fts MATCH {match_string}"
-            )
-        )
+        processed_results = [dict(row) for row in result.mappings().all()]
 
-        processed_results = []
-        final_count = 0
-        for row in count:
-            final_count = row[0]
+        # the count is cached, so it may not include messages that arrived since
+        final_count = count_search_matches(match_string) or 0
+        if processed_results:
+            final_count = max(final_count, page * 50 + len(processed_results))
 
         if final_count == 0:
             session.close()
             return [None, 0]
 
-        for row in result.mappings().all():
-            processed_results.append(dict(row))
-
         session.close()
         return (processed_results, final_count)
     except Exception as e:
@@ -857,13 +956,10 @@ def search_alerts(icao=None, tail=None, flight=None):
                 acarshub_logging.log("SKipping alert search", "database")
                 return None
 
-            processed_results = []
-
-            for row in result.mappings().all():
-                processed_results.insert(0, dict(row))
+            # rows are already newest first, which is the order the caller wants
+            processed_results = [dict(row) for row in result.mappings().all()]
             if len(processed_results) == 0:
                 return None
-            processed_results.reverse()
             session.close()
             return processed_results
         except Exception as e:
@@ -949,17 +1045,28 @@ def show_all(page=0):
     count = 0
     try:
         session = db_session()
-        result = (
-            session.query(messages)
+        # Skip to the page on the msg_time index alone and only read the 50 rows on it.
+        # Offsetting the full query made deep pages walk every row in front of them.
+        # The page links jump straight to any page, so a keyset cursor won't work here
+        page_ids = (
+            session.query(messages.id)
             .order_by(messages.time.desc())
             .limit(50)
             .offset(page * 50)
         )
-        count = session.query(messages).count()
-
-        if count > 0:
-            processed_results = [query_to_dict(d) for d in result]
-            processed_results.reverse()
+        result = (
+            session.query(messages)
+            .filter(messages.id.in_(page_ids.scalar_subquery()))
+            .order_by(messages.time.desc())
+        )
+        processed_results = [query_to_dict(d) for d in result]
+        processed_results.reverse()
+
+        # The row count is cached rather than counted again for every page, so it can
+        # be behind the rows just read. Never report fewer than this page shows
+        count = database_get_row_count()[0] or 0
+        if processed_results:
+            count = max(count, page * 50 + len(processed_results))
     except Exception as e:
         acarshub_logging.acars_traceback(e, "database")
     finally:
@@ -970,6 +1077,7 @@ def show_all(page=0):
         return (processed_results, count)
 
 
+@ttl_cache(30)
 def get_freq_count():
     freq_count = []
     found_freq = []
@@ -1000,6 +1108,7 @@ def get_freq_count():
         )
 
 
+@ttl_cache(30)
 def get_errors():
     count_total, count_errors, nonlogged_good, nonlogged_errors = 0, 0, 0, 0
     try:
@@ -1027,6 +1136,7 @@ def get_errors():
         }
 
 
+@ttl_cache(30)
 def database_get_row_count():
     result = None
     size = None
@@ -1078,6 +1188,7 @@ def get_message_label_json():
     return message_labels["labels"]
 
 
+@ttl_cache(30)
 def get_signal_levels():
     try:
         output = []
@@ -1097,6 +1208,7 @@ def get_signal_levels():
             return []
 
 
+@ttl_cache(30)
 def get_alert_counts():
     global alert_terms
     result_list = []
@@ -1175,6 +1287,7 @@ def set_alert_terms(terms=None):
     finally:
         if session:
             session.close()
+        get_alert_counts.cache_clear()
 
 
 def reset_alert_counts():
@@ -1190,6 +1303,7 @@ def reset_alert_counts():
     finally:
         if session:
             session.close()
+        get_alert_counts.cache_clear()
 
 
 def get_alert_ignore():
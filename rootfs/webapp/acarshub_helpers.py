@@ -17,12 +17,22 @@
 # along with acarshub.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import re
+import html
+import functools
+import json
 import subprocess
 import acarshub_database
 import time
 import acarshub_logging
 from acarshub_logging import LOG_LEVEL
 
+try:
+    import orjson
+except ImportError:
+    # orjson formats the libacars output much quicker, but it isn't required
+    orjson = None
+
 start_time = time.time()
 
 decoders = dict()
@@ -45,32 +55,38 @@ if os.getenv("TAR1090_URL", default=False):
 else:
     ADSB_URL = "https://globe.adsbexchange.com/?icao="
 
-
-def libacars_formatted(libacars=None):
-    import pprint
-
-    html_output = "<p>Decoded:</p>"
-    html_output += "<p>"
-    html_output += "<pre>{libacars}</pre>".format(
-        libacars=pprint.pformat(libacars, indent=2)
-    )
-    html_output += "</p>"
-
-    return html_output
+# Every healthcheck line is matched against one alternation and service_check
+# dispatches on the name of the group that matched
+HEALTHCHECK_RE = re.compile(
+    r"(?P<decoder>(?:acarsdec|dumpvdl2)-.+ =)"
+    r"|(?P<server>^(?:acars|vdlm2|hfdl|imsl|irdm)_server)"
+    r"|(?P<messages>\d+\s+(?:ACARS|VDLM2|HFDL|IMSL|IRDM) messages)"
+    r"|(?P<stats>^(?:acars|vdlm2|hfdl|imsl|irdm)_stats)"
+    r"|(?P<planeplotter>^planeplotter)"
+    r"|(?P<dumpvdl2_planeplotter>dumpvdl2 and planeplotter)"
+)
 
 
-def has_specified_key_not_none(message=None, key=None):
-    if (key is None or message is None) or (
-        key not in message or message[key] is None or message[key] == ""
-    ):
-        return False
-    return True
-
+def libacars_formatted(libacars=None):
+    # live messages carry the decoded libacars as a dict, the database and the IMSL
+    # formatter store it as a JSON string. Either way it is shown indented
+    if isinstance(libacars, str):
+        try:
+            libacars = orjson.loads(libacars) if orjson else json.loads(libacars)
+        except ValueError:
+            pass
+
+    if isinstance(libacars, str):
+        formatted = libacars
+    elif orjson is not None:
+        formatted = orjson.dumps(
+            libacars, option=orjson.OPT_INDENT_2, default=str
+        ).decode()
+    else:
+        formatted = json.dumps(libacars, indent=2, default=str)
 
-def has_specified_key(message=None, key=None):
-    if (key is None or message is None) or (key not in message):
-        return False
-    return True
+    # the front end inserts this as-is, so the decoded text has to be escaped
+    return f"<p>Decoded:</p><p><pre>{html.escape(formatted, quote=False)}</pre></p>"
 
 
 # Function to prepare a message for the front end
@@ -81,32 +97,34 @@ def update_keys(json_message):
     # Santiztize the message of any empty/None vales
     # This won't occur for live messages but if the message originates from a DB query
     # It will return all keys, even ones where the original message didn't have a value
-    stale_keys = []
-    for key in json_message:
-        if not has_specified_key_not_none(json_message, key):
-            stale_keys.append(key)
+    # Callers rely on the message being updated in place, so the stale keys are found in
+    # one pass and then deleted rather than building a new dict
+    stale_keys = [
+        key for key, value in json_message.items() if value is None or value == ""
+    ]
 
     for key in stale_keys:
         del json_message[key]
 
-    # Now we process individual keys, if that key is present
+    # Now we process individual keys, if that key is present. Anything left after the
+    # clean up above has a value, so a plain membership test is enough
 
     # database tablename for the message text doesn't match up with typescript-decoder (needs it to be text)
     # so we rewrite the key
-    if has_specified_key(json_message, "msg_text"):
+    if "msg_text" in json_message:
         json_message["text"] = json_message["msg_text"]
         del json_message["msg_text"]
 
-    if has_specified_key(json_message, "time"):
+    if "time" in json_message:
         json_message["timestamp"] = json_message["time"]
         del json_message["time"]
 
-    if has_specified_key(json_message, "libacars"):
+    if "libacars" in json_message:
         json_message["libacars"] = libacars_formatted(json_message["libacars"])
 
-    if has_specified_key(json_message, "icao"):
+    if "icao" in json_message:
         try:
-            json_message["icao_hex"] = format(int(json_message["icao"]), "X")
+            json_message["icao_hex"] = f"{int(json_message['icao']):X}"
         except Exception as e:
             acarshub_logging.log(
                 f"Unable to convert icao to hex: {json_message['icao']}",
@@ -115,21 +133,19 @@ def update_keys(json_message):
             )
             acarshub_logging.acars_traceback(e, "update_keys")
 
-    if has_specified_key(json_message, "flight") and has_specified_key(
-        json_message, "icao_hex"
-    ):
+    if "flight" in json_message and "icao_hex" in json_message:
         json_message["flight"], json_message["icao_flight"] = flight_finder(
             callsign=json_message["flight"], hex_code=json_message["icao_hex"]
         )
-    elif has_specified_key(json_message, "flight"):
+    elif "flight" in json_message:
         json_message["flight"], json_message["icao_flight"] = flight_finder(
             callsign=json_message["flight"], url=False
         )
-    elif has_specified_key(json_message, "icao_hex"):
+    elif "icao_hex" in json_message:
         json_message["icao_url"] = flight_finder(hex_code=json_message["icao_hex"])
 
-    if has_specified_key(json_message, "toaddr"):
-        json_message["toaddr_hex"] = format(int(json_message["toaddr"]), "X")
+    if "toaddr" in json_message:
+        json_message["toaddr_hex"] = f"{int(json_message['toaddr']):X}"
 
         toaddr_icao, toaddr_name = acarshub_database.lookup_groundstation(
             json_message["toaddr_hex"]
@@ -138,8 +154,8 @@ def update_keys(json_message):
         if toaddr_icao is not None:
             json_message["toaddr_decoded"] = f"{toaddr_name} ({toaddr_icao})"
 
-    if has_specified_key(json_message, "fromaddr"):
-        json_message["fromaddr_hex"] = format(int(json_message["fromaddr"]), "X")
+    if "fromaddr" in json_message:
+        json_message["fromaddr_hex"] = f"{int(json_message['fromaddr']):X}"
 
         fromaddr_icao, fromaddr_name = acarshub_database.lookup_groundstation(
             json_message["fromaddr_hex"]
@@ -148,7 +164,7 @@ def update_keys(json_message):
         if fromaddr_icao is not None:
             json_message["fromaddr_decoded"] = f"{fromaddr_name} ({fromaddr_icao})"
 
-    if has_specified_key(json_message, "label"):
+    if "label" in json_message:
         label_type = acarshub_database.lookup_label(json_message["label"])
 
         if label_type is not None:
@@ -157,9 +173,10 @@ def update_keys(json_message):
             json_message["label_type"] = "Unknown Message Label"
 
 
+# The same callsign/hex pairs show up over and over on a busy feed, and the answer only
+# depends on the arguments and ADSB_URL (fixed at start up), so the results are cached
+@functools.lru_cache(maxsize=4096)
 def flight_finder(callsign=None, hex_code=None, url=True):
-    global ADSB_URL
-
     # If there is only a hex code, we'll return just the ADSB url
     # Front end will format correctly.
 
@@ -269,8 +286,6 @@ def handle_message(message=None):
 
 
 def service_check():
-    import re
-
     global decoders
     global servers
     global receivers
@@ -280,17 +295,20 @@ def service_check():
     global external_formats
 
     if os.getenv("LOCAL_TEST", default=False):
-        healthcheck = subprocess.Popen(
-            ["../../tools/healthtest.sh"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        healthcheck_script = "../../tools/healthtest.sh"
     else:
-        healthcheck = subprocess.Popen(
-            ["/scripts/healthcheck.sh"], stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        )
-    stdout, _ = healthcheck.communicate()
-    healthstatus = stdout.decode()
+        healthcheck_script = "/scripts/healthcheck.sh"
+
+    # The whole output is read before parsing rather than streamed line by line. The
+    # parse below writes straight into the globals the status emit reads, and reading
+    # from the pipe would yield to other green threads part way through.
+    # stderr was never used, so it isn't captured
+    healthstatus = subprocess.run(
+        [healthcheck_script],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    ).stdout
 
     decoders = dict()
     servers = dict()
@@ -299,10 +317,12 @@ def service_check():
     external_formats = dict()
     system_error = False
 
-    for line in healthstatus.split("\n"):
+    for line in healthstatus.splitlines():
         try:
-            match = re.search("(?:acarsdec|dumpvdl2)-.+ =", line)
-            if match:
+            match = HEALTHCHECK_RE.search(line)
+            kind = match.lastgroup if match else None
+
+            if kind == "decoder":
                 if match.group(0).strip(" =") not in decoders:
                     decoders[match.group(0).strip(" =")] = dict()
                     continue
@@ -324,9 +344,7 @@ def service_check():
 
                         continue
 
-            match = re.search("^(?:acars|vdlm2|hfdl|imsl|irdm)_server", line)
-
-            if match:
+            if kind == "server":
                 if match.group(0) not in servers:
                     servers[match.group(0)] = dict()
 
@@ -349,9 +367,7 @@ def service_check():
 
                 continue
 
-            match = re.search("\\d+\\s+(?:ACARS|VDLM2|HFDL|IMSL|IRDM) messages", line)
-
-            if match:
+            if kind == "messages":
                 if line.find("ACARS") != -1 and "ACARS" not in receivers:
                     receivers["ACARS"] = dict()
                     receivers["ACARS"]["Count"] = line.split(" ")[0]
@@ -425,9 +441,7 @@ def service_check():
 
                 continue
 
-            match = re.search("^(acars|vdlm2|hfdl|imsl|irdm)_stats", line)
-
-            if match:
+            if kind == "stats":
                 if match.group(0) not in stats:
                     stats[match.group(0)] = dict()
 
@@ -440,9 +454,7 @@ def service_check():
                     system_error = True
                     stats[match.group(0)]["Status"] = "Unknown"
 
-            match = re.search("^planeplotter", line)
-
-            if match:
+            if kind == "planeplotter":
                 if line.find("vdl2") != -1:
                     pp_decoder = "VDLM2"
                 else:
@@ -466,9 +478,7 @@ def service_check():
                         {"type": "planeplotter", "Status": "Unknown"}
                     )
 
-            match = re.search("dumpvdl2 and planeplotter", line)
-
-            if match:
+            if kind == "dumpvdl2_planeplotter":
                 if line.find("vdl2") != -1:
                     pp_decoder = "VDLM2"
                 else:
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2022-2024 Frederick Clausen II
+# This file is part of acarshub <https://github.com/sdr-enthusiasts/docker-acarshub>.
+#
+# acarshub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# acarshub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with acarshub.  If not, see <http://www.gnu.org/licenses/>.
+
+# Splitting the JSON the decoders send over TCP in to messages
+
+import json
+import re
+import acarshub_logging
+from acarshub_logging import LOG_LEVEL
+
+try:
+    import orjson
+except ImportError:
+    # orjson is much quicker on the small messages the decoders send, but it isn't
+    # required. The standard library also takes bytes
+    orjson = None
+
+if orjson is not None:
+    json_loads = orjson.loads
+else:
+    json_loads = json.loads
+
+# one decoder shared by all of the listeners instead of json.loads setting one up per call
+json_decoder = json.JSONDecoder()
+json_frame_whitespace = re.compile(r"\s*")
+
+
+def split_json_frames(buffer, source):
+    # Pull each complete JSON object out of the buffer using the C json scanner. It keeps
+    # track of strings itself, so braces inside the message text don't break the framing
+    # and back to back objects (with or without a newline between them) come apart cleanly.
+    # Returns the decoded messages and whatever trailing text (with no newline after it)
+    # could not be decoded.
+    messages = []
+    index = json_frame_whitespace.match(buffer).end()
+
+    while index < len(buffer):
+        try:
+            msg, index = json_decoder.raw_decode(buffer, index)
+        except ValueError:
+            line_end = buffer.find("\n", index)
+
+            if line_end == -1:
+                return messages, buffer[index:]
+
+            acarshub_logging.log(
+                f"Skipping Message: {buffer[index:line_end]}",
+                source,
+                level=LOG_LEVEL["DEBUG"],
+            )
+            index = line_end + 1
+        else:
+            messages.append(msg)
+
+        index = json_frame_whitespace.match(buffer, index).end()
+
+    return messages, ""
+
+
+def split_json_lines(buffer, source):
+    # Decoders send one JSON object per line, so split the received bytes on newlines and
+    # decode each complete line. Not every relay sends the newline though, so the piece
+    # after the last newline is decoded too if it looks complete. Whatever is still
+    # incomplete is handed back to be put in front of the next read
+    lines = buffer.split(b"\n")
+    leftover = lines.pop()
+    messages = []
+
+    for line in lines:
+        if not line or line.isspace():
+            continue
+
+        try:
+            messages.append(json_loads(line))
+        except ValueError:
+            # back to back objects on one line, or a bad line. Pick it apart the slow way
+            try:
+                found, rest = split_json_frames(line.decode("utf-8"), source)
+            except UnicodeDecodeError:
+                found, rest = [], line
+
+            messages.extend(found)
+
+            if rest:
+                acarshub_logging.log(
+                    f"Skipping Message: {rest}", source, level=LOG_LEVEL["DEBUG"]
+                )
+
+    # An object (or several run together) can only be complete if it ends in a closing
+    # brace, so a read that stopped part way through a message skips straight past this
+    if leftover.rstrip().endswith(b"}"):
+        try:
+            messages.append(json_loads(leftover))
+            leftover = b""
+        except ValueError:
+            try:
+                found, rest = split_json_frames(leftover.decode("utf-8"), source)
+            except UnicodeDecodeError:
+                # not valid UTF-8. Leave it for the newline handling above on a later read
+                found, rest = [], None
+
+            if rest is not None:
+                messages.extend(found)
+                leftover = rest.encode("utf-8")
+
+    return messages, leftover
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the webapp modules import each other by name from the webapp directory
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "rootfs", "webapp")
+)
@@ -0,0 +1,58 @@
+from acarshub_json import split_json_lines
+
+
+def test_object_without_newline():
+    messages, leftover = split_json_lines(b'{"a":1}', "test")
+
+    assert messages == [{"a": 1}]
+    assert leftover == b""
+
+
+def test_concatenated_objects_without_newline():
+    messages, leftover = split_json_lines(b'{"a":1}{"b":2}', "test")
+
+    assert messages == [{"a": 1}, {"b": 2}]
+    assert leftover == b""
+
+
+def test_newline_terminated_objects():
+    messages, leftover = split_json_lines(b'{"a":1}\n{"b":2}\n', "test")
+
+    assert messages == [{"a": 1}, {"b": 2}]
+    assert leftover == b""
+
+
+def test_partial_object_is_kept():
+    messages, leftover = split_json_lines(b'{"a":1}\n{"b":', "test")
+
+    assert messages == [{"a": 1}]
+    assert leftover == b'{"b":'
+
+
+def test_complete_object_before_partial_one():
+    messages, leftover = split_json_lines(b'{"a":1}{"b":{"c":2}', "test")
+
+    assert messages == [{"a": 1}]
+    assert leftover == b'{"b":{"c":2}'
+
+    messages, leftover = split_json_lines(leftover + b"}", "test")
+
+    assert messages == [{"b": {"c": 2}}]
+    assert leftover == b""
+
+
+def test_split_multibyte_character_is_kept():
+    data = '{"a":"é"}{"b":"é"}'.encode("utf-8")
+    # split between the two bytes of the first é
+    split = data.index("é".encode("utf-8")) + 1
+    first, second = data[:split], data[split:]
+
+    messages, leftover = split_json_lines(first, "test")
+
+    assert messages == []
+    assert leftover == first
+
+    messages, leftover = split_json_lines(leftover + second, "test")
+
+    assert messages == [{"a": "é"}, {"b": "é"}]
+    assert leftover == b""